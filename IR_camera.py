@@ -12,6 +12,13 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 from camera import CameraThread
 from spectrum import SpectrumThread
+from publisher import FramePublisher
+
+# Network publishing of live frames and ROI series (see publish_client.py)
+publish_enabled = False
+publish_host = '0.0.0.0'
+publish_port = 5600
+publish_max_fps = 5.0
 
 class CameraApp(QWidget):
     def __init__(self):
@@ -35,9 +42,19 @@ class CameraApp(QWidget):
         self.blue_intensities = []  # New blue intensities
         self.is_recording = False
         self.video_writer = None
+        self.publisher = None
 
         self.initUI()
 
+        if publish_enabled:
+            publisher = FramePublisher(publish_host, publish_port, max_fps=publish_max_fps)
+            try:
+                publisher.start()
+                self.publisher = publisher
+            except OSError as e:
+                # 发布功能是可选的，失败时不影响采集
+                print(f"Publishing disabled, could not listen on {publish_host}:{publish_port}: {e}")
+
         self.camera_thread = CameraThread(self)
         self.camera_thread.frameCaptured.connect(self.update_image)
 
@@ -369,6 +386,8 @@ class CameraApp(QWidget):
         self.camera_thread.stop()
         self.camera_thread.release_camera()
         self.spectrum_thread.stop()
+        if self.publisher is not None:
+            self.publisher.stop()
 
 
 if __name__ == '__main__':
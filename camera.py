@@ -29,6 +29,10 @@ class CameraThread(QThread):
                 if self.app.is_recording and self.app.video_writer is not None:
                     self.app.video_writer.write(frame)
 
+                # 推送给网络观看端（限速、不阻塞采集）
+                if self.app.publisher is not None:
+                    self.app.publisher.publish_frame(frame)
+
                 # 发射信号，更新帧
                 self.frameCaptured.emit(frame)
 
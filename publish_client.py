@@ -0,0 +1,56 @@
+import sys
+import socket
+import argparse
+import cv2
+import numpy as np
+
+from publisher import read_message, ROI_RECORD, FRAME_STAMP, MSG_ROI, MSG_FRAME, FRAME_ACK
+
+# Reference viewer for the publish server started by IR_camera.py.
+# Shows the live frames in an OpenCV window and prints the ROI series as it arrives.
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a running IR camera experiment over the network")
+    parser.add_argument('host', help="address of the acquisition PC")
+    parser.add_argument('--port', type=int, default=5600)
+    parser.add_argument('--no-video', action='store_true', help="only print the ROI samples")
+    args = parser.parse_args()
+
+    try:
+        sock = socket.create_connection((args.host, args.port), timeout=5)
+    except OSError as e:
+        print(f"Could not connect to {args.host}:{args.port}: {e}")
+        return 1
+    sock.settimeout(None)
+    print(f"Connected to {args.host}:{args.port}")
+
+    try:
+        while True:
+            msg_type, payload = read_message(sock)
+            if msg_type is None:
+                print("Server closed the connection")
+                break
+
+            if msg_type == MSG_ROI:
+                current_time, red, green, blue = ROI_RECORD.unpack(payload)
+                print(f"{current_time:8.2f} s  Red: {red:7.2f}  Green: {green:7.2f}  Blue: {blue:7.2f}")
+            elif msg_type == MSG_FRAME and not args.no_video:
+                jpeg = np.frombuffer(payload, dtype=np.uint8, offset=FRAME_STAMP.size)
+                frame = cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+                if frame is not None:
+                    cv2.imshow("IR Camera (remote)", frame)
+                # 按 q 退出
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                # Ask for the next frame only once this one is on screen. With --no-video we
+                # never ack, so the server stops sending frames after the first one
+                sock.sendall(FRAME_ACK)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        cv2.destroyAllWindows()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
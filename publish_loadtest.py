@@ -0,0 +1,203 @@
+import argparse
+import multiprocessing
+import queue
+import socket
+import threading
+import time
+import cv2
+import numpy as np
+
+from publisher import FramePublisher, read_message, ROI_RECORD, FRAME_STAMP, MSG_ROI, MSG_FRAME, FRAME_ACK
+
+# Localhost load test for the publish server: feeds 640x480 frames and ROI samples at camera
+# rate while many clients subscribe, some of them deliberately slow. The clients run in a
+# separate process, like real viewers, so they do not compete with the acquisition thread
+# for the GIL. It reports the capture rate, the slowest publish call, and what each group
+# of clients received and how stale it was.
+
+class Client(threading.Thread):
+    def __init__(self, port, delay):
+        super().__init__(daemon=True)
+        self.port = port
+        self.delay = delay
+        self.frames = 0
+        self.rois = 0
+        self.bytes = 0
+        self.frame_lags = []
+        self.roi_lags = []
+        self.collecting = True
+        self.address = None
+        self.error = None
+        self.ready = threading.Event()
+
+    def run(self):
+        try:
+            sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+            sock.settimeout(None)
+            self.address = sock.getsockname()
+        except OSError as e:
+            self.error = e
+            return
+        finally:
+            self.ready.set()
+        try:
+            while True:
+                msg_type, payload = read_message(sock)
+                if msg_type is None:
+                    break
+                if not self.collecting:
+                    continue
+                self.bytes += len(payload)
+                # Frame stamps and, in this test, ROI times are wall-clock times on the same machine
+                if msg_type == MSG_ROI:
+                    self.rois += 1
+                    self.roi_lags.append(time.time() - ROI_RECORD.unpack(payload)[0])
+                elif msg_type == MSG_FRAME:
+                    self.frames += 1
+                    self.frame_lags.append(time.time() - FRAME_STAMP.unpack_from(payload)[0])
+                    if self.delay:
+                        time.sleep(self.delay)
+                    sock.sendall(FRAME_ACK)
+        except OSError:
+            pass
+        finally:
+            sock.close()
+
+
+def run_clients(port, delays, commands, results):
+    """Child process: connect one client per delay, report the counts when asked to."""
+    clients = [Client(port, delay) for delay in delays]
+    for client in clients:
+        client.start()
+        client.ready.wait()
+        if client.error is not None:
+            results.put(('error', str(client.error)))
+            return
+    results.put(('ready', None))
+
+    commands.get()
+    for client in clients:
+        client.collecting = False
+    results.put(('counts', [(c.address, c.delay, c.frames, c.rois, c.bytes, c.frame_lags, c.roi_lags)
+                            for c in clients]))
+    for client in clients:
+        client.join(timeout=5)
+
+
+def make_frames(path, count=8):
+    """
+    Frames to publish: a recorded frame if given, otherwise a smooth colour-mapped heat
+    pattern. Mild per-frame noise keeps the JPEG size close to a real IR camera.
+    """
+    if path:
+        base = cv2.imread(path)
+        if base is None:
+            raise SystemExit(f"Could not read frame from {path}")
+        base = cv2.resize(base, (640, 480))
+    else:
+        y, x = np.mgrid[0:480, 0:640]
+        field = 90 + 40 * np.sin(x / 110.0) * np.cos(y / 80.0)
+        field += 100 * np.exp(-((x - 360) ** 2 + (y - 220) ** 2) / (2 * 60.0 ** 2))
+        base = cv2.applyColorMap(np.clip(field, 0, 255).astype(np.uint8), cv2.COLORMAP_INFERNO)
+
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        noise = rng.normal(0, 3, base.shape)
+        frames.append(np.clip(base + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def summarize(name, counts, stats, duration):
+    if not counts:
+        return
+    dropped = sum(stats.get(address, (0, 0))[1] for address, *_ in counts)
+    frames = [c[2] / duration for c in counts]
+    rois = [c[3] / duration for c in counts]
+    mbytes = sum(c[4] for c in counts) / duration / 1e6
+    frame_lags = [lag for c in counts for lag in c[5]] or [0.0]
+    roi_lags = [lag for c in counts for lag in c[6]] or [0.0]
+    print(f"{name:>5} clients: {len(counts):4d}  frames/s per client: {np.mean(frames):6.2f} "
+          f"(min {np.min(frames):5.2f})  ROI/s per client: {np.mean(rois):6.2f}  total {mbytes:7.2f} MB/s  "
+          f"frames dropped: {dropped}")
+    print(f"{'':>5} frame age on arrival: mean {np.mean(frame_lags) * 1000:7.1f} ms  "
+          f"max {np.max(frame_lags) * 1000:7.1f} ms  ROI age max {np.max(roi_lags) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Localhost load test for the IR camera publish server")
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--slow', type=int, default=5, help="clients that sleep after every frame")
+    parser.add_argument('--slow-delay', type=float, default=1.0)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--camera-fps', type=float, default=30.0)
+    parser.add_argument('--max-fps', type=float, default=10.0)
+    parser.add_argument('--frame', help="image file to publish instead of the synthetic frames")
+    args = parser.parse_args()
+    if args.slow > args.clients:
+        parser.error("--slow cannot be larger than --clients")
+
+    frames = make_frames(args.frame)
+    jpeg_size = len(cv2.imencode('.jpg', frames[0], [int(cv2.IMWRITE_JPEG_QUALITY), 70])[1])
+
+    publisher = FramePublisher(host='127.0.0.1', port=0, max_fps=args.max_fps)
+    publisher.start()
+
+    delays = [0.0] * (args.clients - args.slow) + [args.slow_delay] * args.slow
+    commands = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run_clients, args=(publisher.port, delays, commands, results),
+                                      daemon=True)
+    process.start()
+    try:
+        status, error = results.get(timeout=30)
+    except queue.Empty:
+        status, error = 'error', "clients did not start in time"
+    if status == 'error':
+        publisher.stop()
+        raise SystemExit(f"Client could not connect: {error}")
+    deadline = time.time() + 10
+    while publisher.client_count() < len(delays):
+        if time.time() > deadline:
+            publisher.stop()
+            raise SystemExit(f"Only {publisher.client_count()} of {len(delays)} clients registered")
+        time.sleep(0.01)
+
+    interval = 1.0 / args.camera_fps
+    captured = 0
+    slowest_call = 0.0
+    start = time.time()
+    next_tick = start
+    while time.time() - start < args.duration:
+        frame = frames[captured % len(frames)]
+        call_start = time.perf_counter()
+        publisher.publish_frame(frame)
+        slowest_call = max(slowest_call, time.perf_counter() - call_start)
+        if captured % 15 == 0:
+            means = frame.reshape(-1, 3).mean(axis=0)
+            # Wall-clock time instead of experiment time, so the clients can measure the ROI age
+            call_start = time.perf_counter()
+            publisher.publish_roi(time.time(), *means)
+            slowest_call = max(slowest_call, time.perf_counter() - call_start)
+        captured += 1
+        next_tick += interval
+        time.sleep(max(0.0, next_tick - time.time()))
+    duration = time.time() - start
+    # Snapshot now, data still in the socket buffers would be counted after the window
+    stats = publisher.frame_stats()
+    commands.put('counts')
+    _, counts = results.get(timeout=30)
+
+    publisher.stop()
+    process.join(timeout=10)
+
+    print(f"capture: {captured / duration:6.2f} frames/s (target {args.camera_fps}), "
+          f"slowest publish call {slowest_call * 1000:.2f} ms, JPEG frame {jpeg_size / 1000:.1f} kB")
+    # Counts come back in the order of delays: fast clients first
+    fast = args.clients - args.slow
+    summarize("fast", counts[:fast], stats, duration)
+    summarize("slow", counts[fast:], stats, duration)
+
+
+if __name__ == '__main__':
+    main()
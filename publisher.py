@@ -0,0 +1,316 @@
+import socket
+import struct
+import selectors
+import threading
+import time
+from collections import deque
+
+import cv2
+
+# Wire format: every message is a 5-byte header (type, payload length) followed by the payload.
+#   MSG_ROI   payload: time (float64), red, green, blue mean intensity (float32)
+#   MSG_FRAME payload: capture timestamp (float64) followed by the JPEG bytes
+# The viewer answers every frame it has finished with one FRAME_ACK byte. A viewer never has
+# more than one unacknowledged frame, so a viewer that stops acking only receives ROI records.
+HEADER = struct.Struct('!BI')
+ROI_RECORD = struct.Struct('!dfff')
+FRAME_STAMP = struct.Struct('!d')
+MSG_ROI = 1
+MSG_FRAME = 2
+FRAME_ACK = b'\x01'
+# How often the network thread picks up queued ROI records. publish_roi() does not wake it,
+# a syscall there would hand the GIL to the network thread in the middle of acquisition
+ROI_POLL_INTERVAL = 0.05
+
+
+class _Subscriber:
+    """
+    Per-viewer state, only touched by the publisher's network thread.
+    The newest frame waits in a single slot until the viewer has acknowledged the previous
+    one, so a slow viewer skips frames instead of receiving stale ones; ROI records are tiny
+    and get a deep queue.
+    """
+
+    def __init__(self, sock, address, roi_backlog):
+        self.sock = sock
+        self.address = address
+        self.rois = deque(maxlen=roi_backlog)
+        self.frame = None
+        self.frame_in_flight = False
+        # Views into the shared encoded messages, so a frame is never copied per viewer
+        self.out = deque()
+        self.out_frames = 0
+        self.events = selectors.EVENT_READ
+        self.dropped_frames = 0
+        self.sent_frames = 0
+
+    def queue(self, rois, frame):
+        self.rois.extend(rois)
+        if frame is not None:
+            if self.frame is not None:
+                self.dropped_frames += 1
+            self.frame = frame
+
+    def read(self):
+        """Handle acks from the viewer. Returns False once the viewer has gone away."""
+        try:
+            data = self.sock.recv(4096)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        if not data:
+            return False
+        # Only one frame can be in flight, so any byte acknowledges it
+        self.frame_in_flight = False
+        return True
+
+    def flush(self):
+        """Send as much as the socket takes without blocking. Returns False on a dead socket."""
+        if not self.out:
+            # ROI records go first: they are small and nobody wants gaps in the series
+            if self.rois:
+                self.out.append(memoryview(b''.join(self.rois)))
+                self.rois.clear()
+            if self.frame is not None and not self.frame_in_flight:
+                self.out.append(memoryview(self.frame))
+                self.out_frames += 1
+                self.frame = None
+                self.frame_in_flight = True
+        while self.out:
+            try:
+                sent = self.sock.send(self.out[0])
+            except BlockingIOError:
+                return True
+            except OSError:
+                return False
+            if sent < len(self.out[0]):
+                self.out[0] = self.out[0][sent:]
+                return True
+            self.out.popleft()
+        self.sent_frames += self.out_frames
+        self.out_frames = 0
+        return True
+
+
+class FramePublisher:
+    """
+    TCP server that streams live frames and ROI samples to any number of viewers.
+
+    publish_frame() and publish_roi() are called from the acquisition threads and
+    never block on the network: frames are only copied into a single slot and JPEG-encoded
+    at most max_fps times per second by the encoder thread, ROI records are appended to one
+    queue. A single network thread fans both out to the viewers with non-blocking sockets.
+
+    Each viewer has at most one unacknowledged frame and the next one it gets is the newest
+    encoded frame, so a frame is never older than about one encode interval (1 / max_fps)
+    plus the time to transfer one frame when it arrives. ROI records queue behind at most
+    that one frame.
+    """
+
+    def __init__(self, host='0.0.0.0', port=5600, max_fps=5.0, jpeg_quality=70, roi_backlog=4096):
+        self.host = host
+        self.port = port
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.jpeg_quality = jpeg_quality
+        self.roi_backlog = roi_backlog
+
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.pending_frame = None
+        self.pending_time = 0.0
+        self.last_frame_time = 0.0
+        self.frame_ready = threading.Condition(self.lock)
+        self.encoded_frame = None
+        self.roi_queue = deque(maxlen=roi_backlog)
+        self.wake_pending = False
+        self.running = False
+        self.server_socket = None
+        self.wake_send = None
+        self.wake_recv = None
+        self.network_thread = None
+        self.encode_thread = None
+
+    def start(self):
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server_socket.bind((self.host, self.port))
+            self.server_socket.listen()
+        except OSError:
+            self.server_socket.close()
+            raise
+        self.server_socket.setblocking(False)
+        # Port 0 asks the OS for a free port, remember which one we got
+        self.port = self.server_socket.getsockname()[1]
+        # Lets the acquisition threads wake the network thread out of select()
+        self.wake_send, self.wake_recv = socket.socketpair()
+        self.wake_recv.setblocking(False)
+        self.running = True
+
+        self.network_thread = threading.Thread(target=self.network_loop, daemon=True)
+        self.encode_thread = threading.Thread(target=self.encode_loop, daemon=True)
+        self.network_thread.start()
+        self.encode_thread.start()
+        print(f"Publishing on {self.host}:{self.port}")
+
+    def stop(self):
+        with self.lock:
+            if not self.running:
+                return
+            self.running = False
+            self.frame_ready.notify()
+        self.wake()
+        self.network_thread.join()
+        self.encode_thread.join()
+
+    def client_count(self):
+        with self.lock:
+            return len(self.subscribers)
+
+    def frame_stats(self):
+        """
+        Frames sent and dropped so far for every connected viewer.
+        Returns {address: (sent_frames, dropped_frames)}.
+        """
+        with self.lock:
+            return {s.address: (s.sent_frames, s.dropped_frames) for s in self.subscribers}
+
+    def wake(self):
+        with self.lock:
+            if self.wake_pending:
+                return
+            self.wake_pending = True
+        try:
+            self.wake_send.send(b'\0')
+        except (AttributeError, OSError):
+            # Not started yet or already stopped
+            pass
+
+    def publish_frame(self, frame):
+        now = time.time()
+        with self.lock:
+            if not self.subscribers or now - self.last_frame_time < self.min_interval:
+                return
+            self.last_frame_time = now
+            # The capture thread reuses/draws on its buffer, so keep our own copy
+            self.pending_frame = frame.copy()
+            self.pending_time = now
+            self.frame_ready.notify()
+
+    def publish_roi(self, current_time, red_intensity, green_intensity, blue_intensity):
+        payload = ROI_RECORD.pack(current_time, red_intensity, green_intensity, blue_intensity)
+        self.roi_queue.append(HEADER.pack(MSG_ROI, len(payload)) + payload)
+
+    def encode_loop(self):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+        while True:
+            with self.lock:
+                while self.running and self.pending_frame is None:
+                    self.frame_ready.wait()
+                if not self.running:
+                    break
+                frame, stamp = self.pending_frame, self.pending_time
+                self.pending_frame = None
+
+            ok, jpeg = cv2.imencode('.jpg', frame, params)
+            if not ok:
+                continue
+            payload = FRAME_STAMP.pack(stamp) + jpeg.tobytes()
+            with self.lock:
+                self.encoded_frame = HEADER.pack(MSG_FRAME, len(payload)) + payload
+            self.wake()
+
+    def network_loop(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self.server_socket, selectors.EVENT_READ)
+        selector.register(self.wake_recv, selectors.EVENT_READ)
+        try:
+            while self.running:
+                for key, mask in selector.select(ROI_POLL_INTERVAL):
+                    if key.fileobj is self.server_socket:
+                        self.accept_viewers(selector)
+                    elif key.fileobj is self.wake_recv:
+                        try:
+                            self.wake_recv.recv(4096)
+                        except BlockingIOError:
+                            pass
+                    elif key.data.sock is not None:
+                        # Viewers are always watched for reading, so a disconnect is
+                        # noticed right away even when nothing is being sent
+                        if mask & selectors.EVENT_READ and not key.data.read():
+                            self.remove_subscriber(selector, key.data)
+
+                with self.lock:
+                    rois = list(self.roi_queue)
+                    self.roi_queue.clear()
+                    frame, self.encoded_frame = self.encoded_frame, None
+                    self.wake_pending = False
+
+                for subscriber in list(self.subscribers):
+                    subscriber.queue(rois, frame)
+                    if not subscriber.flush():
+                        self.remove_subscriber(selector, subscriber)
+                        continue
+                    events = selectors.EVENT_READ | (selectors.EVENT_WRITE if subscriber.out else 0)
+                    if events != subscriber.events:
+                        selector.modify(subscriber.sock, events, subscriber)
+                        subscriber.events = events
+        finally:
+            for subscriber in list(self.subscribers):
+                self.remove_subscriber(selector, subscriber)
+            selector.close()
+            self.server_socket.close()
+            self.wake_send.close()
+            self.wake_recv.close()
+
+    def accept_viewers(self, selector):
+        while True:
+            try:
+                sock, address = self.server_socket.accept()
+            except OSError:
+                # BlockingIOError once every pending connection has been accepted
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            subscriber = _Subscriber(sock, address, self.roi_backlog)
+            selector.register(sock, subscriber.events, subscriber)
+            with self.lock:
+                self.subscribers.append(subscriber)
+            print(f"Viewer connected: {address[0]}:{address[1]}")
+
+    def remove_subscriber(self, selector, subscriber):
+        with self.lock:
+            if subscriber not in self.subscribers:
+                return
+            self.subscribers.remove(subscriber)
+        selector.unregister(subscriber.sock)
+        subscriber.sock.close()
+        subscriber.sock = None
+        print(f"Viewer disconnected: {subscriber.address[0]}:{subscriber.address[1]} "
+              f"({subscriber.sent_frames} frames sent, {subscriber.dropped_frames} dropped)")
+
+
+def read_message(sock):
+    """
+    Read one message from a publisher socket.
+    Returns (msg_type, payload), or (None, None) once the server has closed the connection.
+    """
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None, None
+    msg_type, length = HEADER.unpack(header)
+    payload = _recv_exact(sock, length)
+    if payload is None:
+        return None, None
+    return msg_type, payload
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    return bytes(buffer)
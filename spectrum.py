@@ -50,6 +50,10 @@ class SpectrumThread(QThread):
                     # 发出信号，包括时间、红、绿、蓝的平均强度
                     self.spectrumCalculated.emit(current_time, red_avg_intensity, green_avg_intensity, blue_avg_intensity)
 
+                    # 推送 ROI 数据给网络观看端
+                    if self.app.publisher is not None:
+                        self.app.publisher.publish_roi(current_time, red_avg_intensity, green_avg_intensity, blue_avg_intensity)
+
     def draw_roi(self, frame, x, y, width, height, color):
         cv2.rectangle(frame, (x, y), (x + width, y + height), color, 2)
 